@@ -1,7 +1,10 @@
 import os
 import sys
+import ctypes
 import json
 import re
+import fnmatch
+import shutil
 import msvcrt
 from typing import List, Dict, Tuple, Optional
 from colorama import init, Fore, Back, Style
@@ -9,9 +12,44 @@ from colorama import init, Fore, Back, Style
 # Initialize colorama
 init()
 
+def enable_vt_mode() -> bool:
+    """Let the Windows console interpret ANSI escape sequences itself, returning whether it can"""
+    try:
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+            return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except (AttributeError, OSError):
+        pass
+    return False
+
+VT_MODE = enable_vt_mode()
+
+# Frames are encoded once. With VT mode they go straight to the byte stream;
+# otherwise they are decoded again for colorama to translate into console calls
+ENCODING = sys.stdout.encoding or 'utf-8'
+
+# Escape sequences used on every frame, looked up once
+RESET = Fore.RESET
+STYLE_RESET = Style.RESET_ALL
+HEADER_STYLE = Back.BLUE + Fore.WHITE
+MESSAGE_STYLE = Fore.YELLOW
+CURRENT_LINE_START = f"{Back.WHITE}{Fore.BLACK}>".encode('ascii')
+CURRENT_LINE_END = Style.RESET_ALL.encode('ascii')
+
+# Key names returned by Ted.get_key
+SPECIAL_KEYS = {'\r': 'KEY_ENTER', '\x08': 'KEY_BACKSPACE', '\x1b': 'KEY_ESC'}
+EXTENDED_KEYS = {'H': 'KEY_UP', 'P': 'KEY_DOWN', 'K': 'KEY_LEFT', 'M': 'KEY_RIGHT'}
+
+# A file type's rules: one combined pattern, the color for each named group,
+# and the color for each keyword/import word matched by the "word" group
+SyntaxRules = Tuple[re.Pattern, Dict[str, str], Dict[str, str]]
+
 class TedConfig:
     def __init__(self):
-        self.syntax_rules: Dict[str, List[Tuple[re.Pattern, str]]] = {}
+        self.syntax_rules: List[Tuple[re.Pattern, SyntaxRules]] = []
         self.load_config()
     
     def load_config(self) -> None:
@@ -28,61 +66,84 @@ class TedConfig:
             except Exception as e:
                 sys.stderr.write(f"Error loading config: {e}\n")
 
-    def parse_config(self, config: Dict) -> Dict[str, List[Tuple[re.Pattern, str]]]:
+    def parse_config(self, config: Dict) -> List[Tuple[re.Pattern, SyntaxRules]]:
         """Parse the configuration file into syntax rules"""
-        rules = {}
+        rules = []
         for file_pattern, patterns in config.items():
-            compiled_rules = []
+            subpatterns = []
+            word_colors = {}
             for pattern in patterns:
                 try:
                     # Keywords
                     if "keywords" in pattern:
                         kw = pattern.get("keywords_list", 
                                        ["def", "class", "if", "else", "for", "while", "return"])
-                        regex = r'\b(' + '|'.join(kw) + r')\b'
-                        color = pattern["keywords"]
-                        compiled_rules.append((re.compile(regex), color))
+                        color = self.get_color(pattern["keywords"])
+                        word_colors.update(dict.fromkeys(kw, color))
                     
                     # Strings
                     if "strings" in pattern:
-                        regex = r'(\".*?\")|(\'.*?\')'
-                        color = pattern["strings"]
-                        compiled_rules.append((re.compile(regex), color))
+                        regex = r'"[^"\\]*(?:\\.[^"\\]*)*"|\'[^\'\\]*(?:\\.[^\'\\]*)*\''
+                        color = self.get_color(pattern["strings"])
+                        subpatterns.append((regex, color))
                     
                     # Numbers
                     if "numbers" in pattern:
                         regex = r'\b\d+\b'
-                        color = pattern["numbers"]
-                        compiled_rules.append((re.compile(regex), color))
+                        color = self.get_color(pattern["numbers"])
+                        subpatterns.append((regex, color))
                     
                     # Comments
                     if "comments" in pattern:
-                        regex = r'#.*$' if file_pattern == "*.py" else r'\/\/.*$'
-                        color = pattern["comments"]
-                        compiled_rules.append((re.compile(regex), color))
+                        regex = r'#.*' if file_pattern == "*.py" else r'//.*'
+                        color = self.get_color(pattern["comments"])
+                        subpatterns.append((regex, color))
                     
                     # Imports
                     if "import" in pattern:
-                        regex = r'\b(import|from)\b' if file_pattern == "*.py" else r'\b(import|require)\b'
-                        color = pattern["import"]
-                        compiled_rules.append((re.compile(regex), color))
+                        words = ["import", "from"] if file_pattern == "*.py" else ["import", "require"]
+                        color = self.get_color(pattern["import"])
+                        word_colors.update(dict.fromkeys(words, color))
                     
                 except Exception as e:
                     sys.stderr.write(f"Error parsing rule: {e}\n")
-            rules[file_pattern] = compiled_rules
+            if not subpatterns and not word_colors:
+                continue
+
+            # Merge every rule into one alternation so each line is scanned once.
+            # Keywords and imports are looked up in word_colors instead of being
+            # spelled out in the regex, so one group covers every word-like one.
+            # That group comes last and takes whole runs of word characters, so
+            # numbers match first and "1if" or "éif" never color an inner "if".
+            # Keywords that are not plain words get their own escaped alternation.
+            # None of the groups can backtrack badly, so plain re stays linear per line.
+            symbols = sorted((w for w in word_colors if not re.fullmatch(r'\w+', w)), key=len, reverse=True)
+            groups = [f"(?P<sym>{'|'.join(map(re.escape, symbols))})"] if symbols else []
+            groups += [f'(?P<g{i}>{regex})' for i, (regex, _) in enumerate(subpatterns)]
+            if word_colors:
+                groups.append(r'(?P<word>\w+)')
+            try:
+                combined = re.compile('|'.join(groups))
+            except re.error as e:
+                sys.stderr.write(f"Error parsing rule: {e}\n")
+                continue
+            group_colors = {f'g{i}': color for i, (_, color) in enumerate(subpatterns)}
+
+            # Convert wildcard pattern to regex once, at load time
+            glob_regex = re.compile(fnmatch.translate(file_pattern))
+            rules.append((glob_regex, (combined, group_colors, word_colors)))
         return rules
 
-    def get_rules_for_file(self, filename: Optional[str]) -> List[Tuple[re.Pattern, str]]:
+    def get_rules_for_file(self, filename: Optional[str]) -> Optional[SyntaxRules]:
         """Get syntax rules for a specific file"""
         if not filename:
-            return []
+            return None
         
-        for pattern, rules in self.syntax_rules.items():
-            # Convert wildcard pattern to regex
-            regex_pattern = pattern.replace('.', '\.').replace('*', '.*').replace('?', '.')
-            if re.fullmatch(regex_pattern, os.path.basename(filename)):
+        basename = os.path.basename(filename)
+        for glob_regex, rules in self.syntax_rules:
+            if glob_regex.fullmatch(basename):
                 return rules
-        return []
+        return None
 
     @staticmethod
     def get_color(color_name: str) -> str:
@@ -99,24 +160,106 @@ class TedConfig:
         }
         return color_map.get(color_name.lower(), Fore.WHITE)
 
+class GapBuffer:
+    """A line of text with a movable gap at the edit point"""
+
+    def __init__(self, text: str = ""):
+        # The character list is only built on the first edit, so loading a file
+        # keeps just one str per line
+        self.buffer: Optional[List[str]] = None
+        self.gap_start = len(text)
+        self.gap_end = len(text)
+        self._text: Optional[str] = text
+
+    def __len__(self) -> int:
+        if self.buffer is None:
+            return len(self._text)
+        return len(self.buffer) - (self.gap_end - self.gap_start)
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = "".join(self.buffer[:self.gap_start]) + "".join(self.buffer[self.gap_end:])
+        return self._text
+
+    def expand(self) -> None:
+        """Build the character list from the text before the first edit"""
+        if self.buffer is None:
+            self.buffer = list(self._text)
+
+    def move_to(self, pos: int) -> None:
+        """Move the gap so that it starts at pos"""
+        self.expand()
+        if pos < self.gap_start:
+            count = self.gap_start - pos
+            self.buffer[self.gap_end - count:self.gap_end] = self.buffer[pos:self.gap_start]
+            self.gap_start -= count
+            self.gap_end -= count
+        elif pos > self.gap_start:
+            count = pos - self.gap_start
+            self.buffer[self.gap_start:pos] = self.buffer[self.gap_end:self.gap_end + count]
+            self.gap_start += count
+            self.gap_end += count
+
+    def insert(self, text: str) -> None:
+        """Insert text at the gap"""
+        self.expand()
+        if self.gap_end - self.gap_start < len(text):
+            grow = max(len(text), len(self.buffer), 16)
+            self.buffer[self.gap_end:self.gap_end] = [""] * grow
+            self.gap_end += grow
+        self.buffer[self.gap_start:self.gap_start + len(text)] = text
+        self.gap_start += len(text)
+        self._text = None
+
+    def delete_back(self) -> None:
+        """Delete the character before the gap"""
+        self.expand()
+        if self.gap_start > 0:
+            self.gap_start -= 1
+            self._text = None
+
+    def delete_forward(self) -> None:
+        """Delete the character after the gap"""
+        self.expand()
+        if self.gap_end < len(self.buffer):
+            self.gap_end += 1
+            self._text = None
+
+    def split(self, pos: int) -> 'GapBuffer':
+        """Cut the line at pos and return the text after it as a new line"""
+        self.move_to(pos)
+        tail = GapBuffer("".join(self.buffer[self.gap_end:]))
+        del self.buffer[self.gap_end:]
+        self._text = None
+        return tail
+
 class Ted:
+    # Screen row below the footer where ':' commands are typed
+    COMMAND_ROW = 25
+
     def __init__(self, filename: Optional[str] = None):
         self.filename = filename
-        self.content: List[str] = [""]
+        self.content: List[GapBuffer] = [GapBuffer()]
         self.mode = 'normal'
         self.cursor_y = 0
         self.cursor_x = 0
         self.message = ""
         self.quit = False
         self.dirty = False
+        self.trailing_newline = False  # Whether the file ended with a newline when loaded
+        self.last_rendered: Dict[int, bytes] = {}  # Screen row -> bytes drawn there
+        self.hl_cache: Dict[int, Tuple[str, int, int, bytes]] = {}  # Line -> (source, left, right, encoded highlight)
         self.config = TedConfig()
         self.syntax_rules = self.config.get_rules_for_file(filename)
         
         if filename and os.path.exists(filename):
             with open(filename, 'r') as f:
-                self.content = f.read().splitlines()
-                if not self.content:
-                    self.content = [""]
+                text = f.read()
+            # Remember the final newline instead of keeping an empty last line for it
+            self.trailing_newline = text.endswith('\n')
+            if self.trailing_newline:
+                text = text[:-1]
+            self.content = [GapBuffer(line) for line in text.split('\n')]
 
     def ensure_cursor_in_bounds(self) -> None:
         """Keep cursor position within valid bounds"""
@@ -126,81 +269,129 @@ class Ted:
 
     def clear_screen(self) -> None:
         """Clear the terminal screen"""
-        os.system('cls')
+        sys.stdout.write('\x1b[2J\x1b[H')
+        sys.stdout.flush()
 
-    def apply_syntax_highlighting(self, line: str) -> str:
-        """Apply syntax highlighting to a line of text"""
-        if not self.syntax_rules or not line:
-            return line
-        
-        colored_line = line
-        for pattern, color_name in self.syntax_rules:
-            color = self.config.get_color(color_name)
-            for match in pattern.finditer(line):
-                start, end = match.span()
-                colored_line = (
-                    colored_line[:start] +
-                    color + line[start:end] + Fore.RESET +
-                    colored_line[end:]
-                )
+    def apply_syntax_highlighting(self, line: str, left: int, right: int) -> str:
+        """Apply syntax highlighting to the columns left..right of a line"""
+        if not self.syntax_rules or left >= len(line):
+            return line[left:right]
+
+        pattern, group_colors, word_colors = self.syntax_rules
+
+        # Tokens are matched against the whole line so one cut by the window edge
+        # keeps its color; the scan stops at the first token past the right edge
+        parts = []
+        pos = left
+        for match in pattern.finditer(line):
+            start, end = match.span()
+            if start >= right:
+                break
+            if end <= left:
+                continue
+            if match.lastgroup in ('word', 'sym'):
+                color = word_colors.get(match.group())
+                if color is None:
+                    continue
+            else:
+                color = group_colors[match.lastgroup]
+            start = max(start, left)
+            end = min(end, right)
+            parts += (line[pos:start], color, line[start:end], RESET)
+            pos = end
+        parts.append(line[pos:right])
+        return "".join(parts)
+
+    def highlight_line(self, y: int, line: str, left: int, right: int) -> bytes:
+        """Highlight and encode the visible part of a line, reusing the last result while it is unchanged"""
+        cached = self.hl_cache.get(y)
+        if cached is not None and cached[0] == line and cached[1] == left and cached[2] == right:
+            return cached[3]
+        colored_line = self.apply_syntax_highlighting(line, left, right).encode(ENCODING, 'replace')
+        self.hl_cache[y] = (line, left, right, colored_line)
         return colored_line
 
+    def shift_hl_cache(self, y: int, delta: int) -> None:
+        """Re-key cached highlights after lines are inserted (delta > 0) or removed at y"""
+        self.hl_cache = {
+            (k + delta if k >= y else k): v
+            for k, v in self.hl_cache.items()
+            if not y <= k < y - delta
+        }
+
     def display(self) -> None:
-        """Render the editor interface"""
-        self.clear_screen()
+        """Render the editor interface, rewriting only the rows that changed"""
         self.ensure_cursor_in_bounds()
-        
-        # Display header
-        print(f"{Back.BLUE}{Fore.WHITE}Ted - {self.filename or '[No Name]'}", end='')
-        print(f"{' [+]' if self.dirty else ''} | {self.mode.upper()} mode", end='')
-        print(f" | Line {self.cursor_y + 1}/{len(self.content)}{Style.RESET_ALL}")
-        print("-" * 80)
+        if not self.last_rendered:
+            self.clear_screen()
+
+        # Header
+        rows = [
+            f"{HEADER_STYLE}Ted - {self.filename or '[No Name]'}"
+            f"{' [+]' if self.dirty else ''} | {self.mode.upper()} mode"
+            f" | Line {self.cursor_y + 1}/{len(self.content)}{STYLE_RESET}".encode(ENCODING, 'replace'),
+            b"-" * 80,
+        ]
         
         # Display content around cursor
         start_line = max(0, self.cursor_y - 10)
         end_line = min(len(self.content), self.cursor_y + 10)
+
+        # Only the visible columns get highlighted; scroll sideways to keep the cursor on screen
+        text_width = max(1, shutil.get_terminal_size().columns - 2)
+        left = max(0, self.cursor_x - text_width + 1)
         
-        for y in range(start_line, end_line):
-            line = self.content[y] if y < len(self.content) else ""
-            colored_line = self.apply_syntax_highlighting(line)
+        content = self.content
+        highlight_line = self.highlight_line
+        for y in range(start_line, start_line + 20):
+            if y >= end_line:
+                rows.append(b"")
+                continue
+            line = str(content[y])
+            colored_line = highlight_line(y, line, left, left + text_width)
             
             if y == self.cursor_y:
-                print(f"{Back.WHITE}{Fore.BLACK}>{colored_line}{Style.RESET_ALL}")
-                print(" " * (self.cursor_x + 1) + "^")
+                rows.append(CURRENT_LINE_START + colored_line + CURRENT_LINE_END)
             else:
-                print(f" {colored_line}")
+                rows.append(b" " + colored_line)
         
-        print("-" * 80)
-        if self.message:
-            print(f"{Fore.YELLOW}{self.message}{Style.RESET_ALL}")
-            self.message = ""
+        rows.append(b"-" * 80)
+        rows.append(f"{MESSAGE_STYLE}{self.message}{STYLE_RESET}".encode(ENCODING, 'replace')
+                    if self.message else b"")
+        self.message = ""
+
+        # Gather the whole frame and hand it to the terminal in one write
+        parts = []
+        for row, text in enumerate(rows, 1):
+            if self.last_rendered.get(row) != text:
+                parts.append(b"\x1b[%d;1H\x1b[2K%s" % (row, text))
+                self.last_rendered[row] = text
+
+        # Park the terminal cursor on the edit position
+        parts.append(b"\x1b[%d;%dH" % (self.cursor_y - start_line + 3, self.cursor_x - left + 2))
+        frame = b"".join(parts)
+        if VT_MODE:
+            sys.stdout.buffer.write(frame)
+            sys.stdout.buffer.flush()
+        else:
+            sys.stdout.write(frame.decode(ENCODING))
+            sys.stdout.flush()
 
     def get_key(self) -> str:
-        """Get a single key input"""
+        """Get a single key input, blocking until one is available"""
         while True:
-            if msvcrt.kbhit():
-                ch = msvcrt.getch()
-                if ch == b'\xe0':  # Extended key code
-                    ch = msvcrt.getch()
-                    if ch == b'H':
-                        return 'KEY_UP'
-                    elif ch == b'P':
-                        return 'KEY_DOWN'
-                    elif ch == b'K':
-                        return 'KEY_LEFT'
-                    elif ch == b'M':
-                        return 'KEY_RIGHT'
-                elif ch == b'\r':
-                    return 'KEY_ENTER'
-                elif ch == b'\x08':
-                    return 'KEY_BACKSPACE'
-                elif ch == b'\x1b':
-                    return 'KEY_ESC'
-                else:
-                    try:
-                        return ch.decode('utf-8')
-                    except:
-                        continue
+            ch = msvcrt.getwch()
+            # Extended keys arrive as a prefix plus a code; a lone '\xe0' is a typed 'à'
+            if ch == '\x00' or (ch == '\xe0' and msvcrt.kbhit()):
+                key = EXTENDED_KEYS.get(msvcrt.getwch())
+                if key:
+                    return key
+            elif '\ud800' <= ch <= '\udbff':
+                # Characters outside the BMP arrive as a UTF-16 surrogate pair
+                pair = ch + msvcrt.getwch()
+                return pair.encode('utf-16', 'surrogatepass').decode('utf-16', 'replace')
+            else:
+                return SPECIAL_KEYS.get(ch, ch)
 
     def handle_normal_mode(self, key: str) -> None:
         """Handle key presses in normal mode"""
@@ -221,16 +412,19 @@ class Ted:
         elif key == 'x':
             if self.cursor_x < len(self.content[self.cursor_y]):
                 line = self.content[self.cursor_y]
-                self.content[self.cursor_y] = line[:self.cursor_x] + line[self.cursor_x+1:]
+                line.move_to(self.cursor_x)
+                line.delete_forward()
                 self.dirty = True
         elif key == 'o':
-            self.content.insert(self.cursor_y + 1, "")
+            self.content.insert(self.cursor_y + 1, GapBuffer())
+            self.shift_hl_cache(self.cursor_y + 1, 1)
             self.cursor_y += 1
             self.cursor_x = 0
             self.mode = 'insert'
             self.dirty = True
         elif key == 'O':
-            self.content.insert(self.cursor_y, "")
+            self.content.insert(self.cursor_y, GapBuffer())
+            self.shift_hl_cache(self.cursor_y, 1)
             self.cursor_x = 0
             self.mode = 'insert'
             self.dirty = True
@@ -256,19 +450,23 @@ class Ted:
         elif key == 'KEY_BACKSPACE':
             if self.cursor_x > 0:
                 line = self.content[self.cursor_y]
-                self.content[self.cursor_y] = line[:self.cursor_x-1] + line[self.cursor_x:]
+                line.move_to(self.cursor_x)
+                line.delete_back()
                 self.cursor_x -= 1
                 self.dirty = True
             elif self.cursor_y > 0:
-                self.cursor_x = len(self.content[self.cursor_y-1])
-                self.content[self.cursor_y-1] += self.content[self.cursor_y]
+                prev_line = self.content[self.cursor_y-1]
+                self.cursor_x = len(prev_line)
+                prev_line.move_to(self.cursor_x)
+                prev_line.insert(str(self.content[self.cursor_y]))
                 del self.content[self.cursor_y]
+                self.shift_hl_cache(self.cursor_y, -1)
                 self.cursor_y -= 1
                 self.dirty = True
         elif key == 'KEY_ENTER':
             line = self.content[self.cursor_y]
-            self.content.insert(self.cursor_y + 1, line[self.cursor_x:])
-            self.content[self.cursor_y] = line[:self.cursor_x]
+            self.content.insert(self.cursor_y + 1, line.split(self.cursor_x))
+            self.shift_hl_cache(self.cursor_y + 1, 1)
             self.cursor_y += 1
             self.cursor_x = 0
             self.dirty = True
@@ -284,15 +482,18 @@ class Ted:
             self.cursor_x = min(self.cursor_x, len(self.content[self.cursor_y]))
         elif len(key) == 1 and ord(key) >= 32:  # Printable characters
             line = self.content[self.cursor_y]
-            self.content[self.cursor_y] = line[:self.cursor_x] + key + line[self.cursor_x:]
+            line.move_to(self.cursor_x)
+            line.insert(key)
             self.cursor_x += 1
             self.dirty = True
 
     def get_command(self) -> None:
         """Process command-line commands (starting with :)"""
-        print("\n:" + Style.RESET_ALL, end='', flush=True)
+        print(f"\x1b[{self.COMMAND_ROW};1H\x1b[2K:" + STYLE_RESET, end='', flush=True)
         cmd = input()
         self.process_command(cmd)
+        # input() may have scrolled the terminal, so repaint everything next frame
+        self.last_rendered.clear()
 
     def process_command(self, cmd: str) -> None:
         """Execute editor commands"""
@@ -325,8 +526,13 @@ class Ted:
     def save_file(self) -> None:
         """Save content to file"""
         try:
-            with open(self.filename, 'w') as f:
-                f.write("\n".join(self.content))
+            with open(self.filename, 'w', buffering=1 << 20) as f:
+                # Stream the lines out rather than joining the whole file into one string
+                lines = iter(self.content)
+                f.write(str(next(lines)))
+                f.writelines("\n" + str(line) for line in lines)
+                if self.trailing_newline:
+                    f.write("\n")
             self.message = f"'{self.filename}' {len(self.content)}L written"
             self.dirty = False
         except Exception as e:
@@ -356,9 +562,9 @@ class Ted:
             print(f"\nEditor error: {str(e)}")
             sys.exit(1)
 
-if __name__ == "__main__":
-    # Create default config if it doesn't exist
-    default_config = {
+def default_config() -> Dict:
+    """Syntax rules written to ~/ted.conf on first run"""
+    return {
         "*.py": [
             {
                 "keywords": "yellow",
@@ -381,10 +587,14 @@ if __name__ == "__main__":
         ]
     }
 
+if __name__ == "__main__":
+    # Create default config if it doesn't exist; exclusive create skips the separate exists() check
     config_path = os.path.join(os.path.expanduser("~"), "ted.conf")
-    if not os.path.exists(config_path):
-        with open(config_path, 'w') as f:
-            json.dump(default_config, f, indent=4)
+    try:
+        with open(config_path, 'x') as f:
+            json.dump(default_config(), f, indent=4)
+    except FileExistsError:
+        pass
 
     filename = sys.argv[1] if len(sys.argv) > 1 else None
     editor = Ted(filename)
@@ -4,72 +4,131 @@ import os
 import sys
 import curses
 import json
+import functools
 import re
-from typing import List, Dict, Tuple, Optional
+import fnmatch
+from typing import Callable, List, Dict, Tuple, Optional
+
+# A file type's rules: one combined pattern, the color for each named group,
+# and the color for each keyword/import word matched by the "word" group
+SyntaxRules = Tuple[re.Pattern, Dict[str, int], Dict[str, int]]
+
+# Parsed rules plus the filename matcher built from them: the matcher folds every
+# file pattern into one alternation, and the group that matches names the rules
+ConfigRules = Tuple[Dict[str, SyntaxRules], Optional[re.Pattern], Dict[str, SyntaxRules]]
+
+@functools.lru_cache(maxsize=1)
+def load_syntax_rules() -> ConfigRules:
+    """Load and compile syntax highlighting rules from ted.conf, once per process"""
+    config_path = os.path.expanduser("~/.ted.conf")
+    if not os.path.exists(config_path):
+        config_path = "/etc/ted.conf"
+    
+    rules = {}
+    if os.path.exists(config_path):
+        try:
+            with open(config_path, 'r') as f:
+                config = json.load(f)
+                rules = TedConfig.parse_config(config)
+        except Exception as e:
+            sys.stderr.write(f"Error loading config: {e}\n")
+
+    if not rules:
+        return rules, None, {}
+    # Earlier patterns still take precedence, as alternation tries them in order
+    filename_matcher = re.compile('|'.join(
+        f'(?P<r{i}>{fnmatch.translate(file_pattern)})' for i, file_pattern in enumerate(rules)
+    ))
+    rules_by_group = {f'r{i}': file_rules for i, file_rules in enumerate(rules.values())}
+    return rules, filename_matcher, rules_by_group
 
 class TedConfig:
     def __init__(self):
-        self.syntax_rules: Dict[str, List[Tuple[re.Pattern, int]] = {}
+        self.syntax_rules: Dict[str, SyntaxRules] = {}
+        self.filename_matcher: Optional[re.Pattern] = None
+        self.rules_by_group: Dict[str, SyntaxRules] = {}
         self.load_config()
     
     def load_config(self) -> None:
         """Load syntax highlighting rules from ted.conf"""
-        config_path = os.path.expanduser("~/.ted.conf")
-        if not os.path.exists(config_path):
-            config_path = "/etc/ted.conf"
-        
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r') as f:
-                    config = json.load(f)
-                    self.syntax_rules = self.parse_config(config)
-            except Exception as e:
-                sys.stderr.write(f"Error loading config: {e}\n")
+        self.syntax_rules, self.filename_matcher, self.rules_by_group = load_syntax_rules()
 
-    def parse_config(self, config: Dict) -> Dict[str, List[Tuple[re.Pattern, int]]]:
+    @staticmethod
+    def parse_config(config: Dict) -> Dict[str, SyntaxRules]:
         """Parse the configuration file into syntax rules"""
         rules = {}
         for file_pattern, patterns in config.items():
-            compiled_rules = []
+            subpatterns = []
+            word_colors = {}
             for pattern in patterns:
                 try:
                     # Keywords
                     if "keywords" in pattern:
                         kw = pattern.get("keywords_list", 
                                        ["def", "class", "if", "else", "for", "while", "return"])
-                        regex = r'\b(' + '|'.join(kw) + r')\b'
-                        color = self.get_color(pattern["keywords"])
-                        compiled_rules.append((re.compile(regex), color))
+                        color = TedConfig.get_color(pattern["keywords"])
+                        word_colors.update(dict.fromkeys(kw, color))
                     
                     # Strings
                     if "strings" in pattern:
-                        regex = r'(\".*?\")|(\'.*?\')'
-                        color = self.get_color(pattern["strings"])
-                        compiled_rules.append((re.compile(regex), color))
+                        # Each character can only be taken by one branch of the loop,
+                        # so an unclosed quote fails in linear time under plain re
+                        regex = r'"[^"\\]*(?:\\.[^"\\]*)*"|\'[^\'\\]*(?:\\.[^\'\\]*)*\''
+                        color = TedConfig.get_color(pattern["strings"])
+                        subpatterns.append(('str', regex, color))
                     
                     # Numbers
                     if "numbers" in pattern:
                         regex = r'\b\d+\b'
-                        color = self.get_color(pattern["numbers"])
-                        compiled_rules.append((re.compile(regex), color))
+                        color = TedConfig.get_color(pattern["numbers"])
+                        subpatterns.append(('num', regex, color))
                     
                     # Comments
                     if "comments" in pattern:
                         regex = r'#.*$'
-                        color = self.get_color(pattern["comments"])
-                        compiled_rules.append((re.compile(regex), color))
+                        color = TedConfig.get_color(pattern["comments"])
+                        subpatterns.append(('cmt', regex, color))
                     
                     # Imports
                     if "import" in pattern:
-                        regex = r'\b(import|from)\b'
-                        color = self.get_color(pattern["import"])
-                        compiled_rules.append((re.compile(regex), color))
+                        color = TedConfig.get_color(pattern["import"])
+                        word_colors.update(dict.fromkeys(["import", "from"], color))
                     
                 except Exception as e:
                     sys.stderr.write(f"Error parsing rule: {e}\n")
-            rules[file_pattern] = compiled_rules
+            if not subpatterns and not word_colors:
+                continue
+
+            # Merge every rule into one alternation so each line is scanned once.
+            # Keywords and imports are looked up in word_colors rather than spelled
+            # out in the regex, so a single group covers every word-like one. It
+            # comes last and takes whole runs of word characters, so numbers match
+            # first and "1if" or "éif" never color an inner "if". Keywords that are
+            # not plain words get their own escaped alternation instead.
+            symbols = sorted((w for w in word_colors if not re.fullmatch(r'\w+', w)), key=len, reverse=True)
+            if symbols:
+                subpatterns.insert(0, ('sym', '|'.join(map(re.escape, symbols)), None))
+            if word_colors:
+                subpatterns.append(('word', r'\w+', None))
+            try:
+                combined = re.compile('|'.join(f'(?P<{name}>{regex})' for name, regex, _ in subpatterns))
+            except re.error as e:
+                sys.stderr.write(f"Error parsing rule: {e}\n")
+                continue
+            group_colors = {name: color for name, _, color in subpatterns if color is not None}
+            rules[file_pattern] = (combined, group_colors, word_colors)
         return rules
 
+    def get_rules_for_file(self, filename: Optional[str]) -> Optional[SyntaxRules]:
+        """Get syntax rules for a specific file"""
+        if not filename or self.filename_matcher is None:
+            return None
+
+        match = self.filename_matcher.match(os.path.basename(filename))
+        if match is None:
+            return None
+        return self.rules_by_group[match.lastgroup]
+
     @staticmethod
     def get_color(color_name: str) -> int:
         """Map color names to curses color pairs"""
@@ -85,24 +144,116 @@ class TedConfig:
         }
         return color_map.get(color_name.lower(), curses.COLOR_WHITE)
 
+class GapBuffer:
+    """A line of text with a movable gap at the edit point"""
+    __slots__ = ('buffer', 'gap_start', 'gap_end', '_text', 'highlight')
+
+    def __init__(self, text: str = ""):
+        # The character list is only built on the first edit, so loading a file
+        # keeps just one str per line
+        self.buffer: Optional[List[str]] = None
+        self.gap_start = len(text)
+        self.gap_end = len(text)
+        self._text: Optional[str] = text
+        # (text, width, spans) from the last time Ted highlighted this line
+        self.highlight: Optional[Tuple[str, int, List[Tuple[int, int, int]]]] = None
+
+    def __len__(self) -> int:
+        if self.buffer is None:
+            return len(self._text)
+        return len(self.buffer) - (self.gap_end - self.gap_start)
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = "".join(self.buffer[:self.gap_start]) + "".join(self.buffer[self.gap_end:])
+        return self._text
+
+    def expand(self) -> None:
+        """Build the character list from the text before the first edit"""
+        if self.buffer is None:
+            self.buffer = list(self._text)
+
+    def move_to(self, pos: int) -> None:
+        """Move the gap so that it starts at pos"""
+        self.expand()
+        if pos < self.gap_start:
+            count = self.gap_start - pos
+            self.buffer[self.gap_end - count:self.gap_end] = self.buffer[pos:self.gap_start]
+            self.gap_start -= count
+            self.gap_end -= count
+        elif pos > self.gap_start:
+            count = pos - self.gap_start
+            self.buffer[self.gap_start:pos] = self.buffer[self.gap_end:self.gap_end + count]
+            self.gap_start += count
+            self.gap_end += count
+
+    def insert(self, text: str) -> None:
+        """Insert text at the gap"""
+        self.expand()
+        if self.gap_end - self.gap_start < len(text):
+            grow = max(len(text), len(self.buffer), 16)
+            self.buffer[self.gap_end:self.gap_end] = [""] * grow
+            self.gap_end += grow
+        self.buffer[self.gap_start:self.gap_start + len(text)] = text
+        self.gap_start += len(text)
+        self._text = None
+
+    def delete_back(self) -> None:
+        """Delete the character before the gap"""
+        self.expand()
+        if self.gap_start > 0:
+            self.gap_start -= 1
+            self._text = None
+
+    def delete_forward(self) -> None:
+        """Delete the character after the gap"""
+        self.expand()
+        if self.gap_end < len(self.buffer):
+            self.gap_end += 1
+            self._text = None
+
+    def split(self, pos: int) -> 'GapBuffer':
+        """Cut the line at pos and return the text after it as a new line"""
+        self.move_to(pos)
+        tail = GapBuffer("".join(self.buffer[self.gap_end:]))
+        del self.buffer[self.gap_end:]
+        self._text = None
+        return tail
+
 class Ted:
+    # Color pair number of the first syntax color; pair SYNTAX_PAIR_BASE + n uses curses color n
+    SYNTAX_PAIR_BASE = 3
+
     def __init__(self, filename: Optional[str] = None):
         self.filename = filename
-        self.content: List[str] = [""]
+        self.content: List[GapBuffer] = [GapBuffer()]
         self.mode = 'normal'  # 'normal', 'insert', 'visual'
         self.cursor_y = 0
         self.cursor_x = 0
         self.message = ""
         self.quit = False
         self.dirty = False
+        self.line_ending = b"\n"  # Line ending the file used, written back on save
+        self.trailing_newline = False  # Whether the file ended with a newline when loaded
+        self.prescan_y = 0  # Next line to highlight ahead of time while no key is waiting
         self.config = TedConfig()
         self.syntax_rules = self.config.get_rules_for_file(filename)
         
         if filename and os.path.exists(filename):
-            with open(filename, 'r') as f:
-                self.content = f.read().splitlines()
-                if not self.content:
-                    self.content = [""]
+            # Read the raw bytes in one go and split them in C before decoding each line
+            with open(filename, 'rb') as f:
+                data = f.read()
+            # Keep the line ending and the final newline aside so the lines hold only text
+            first_end = data.find(b"\n")
+            if first_end > 0 and data[first_end - 1] == ord("\r"):
+                self.line_ending = b"\r\n"
+                data = data.replace(b"\r\n", b"\n")
+            self.trailing_newline = data.endswith(b"\n")
+            if self.trailing_newline:
+                data = data[:-1]
+            self.content = [GapBuffer(line.decode('utf-8', 'surrogateescape')) for line in data.split(b"\n")]
+
+        self.bind_keys()
 
         # Curses setup
         self.stdscr = curses.initscr()
@@ -113,6 +264,10 @@ class Ted:
         # Initialize colors
         curses.start_color()
         self.init_colors()
+
+        # Flush stdscr once so reading keys from it never repaints over the windows
+        self.stdscr.refresh()
+        self.create_windows()
     
     def init_colors(self) -> None:
         """Initialize color pairs for syntax highlighting"""
@@ -120,182 +275,382 @@ class Ted:
         curses.init_pair(1, curses.COLOR_WHITE, curses.COLOR_BLUE)  # Status bar
         curses.init_pair(2, curses.COLOR_BLACK, curses.COLOR_WHITE)  # Message bar
         
-        # Syntax highlighting colors
-        curses.init_pair(3, curses.COLOR_RED, curses.COLOR_BLACK)    # Keywords
-        curses.init_pair(4, curses.COLOR_GREEN, curses.COLOR_BLACK)  # Strings
-        curses.init_pair(5, curses.COLOR_YELLOW, curses.COLOR_BLACK) # Numbers
-        curses.init_pair(6, curses.COLOR_CYAN, curses.COLOR_BLACK)   # Comments
-        curses.init_pair(7, curses.COLOR_MAGENTA, curses.COLOR_BLACK) # Imports
+        # Syntax highlighting colors: one pair per curses color, on black
+        for color in range(8):
+            curses.init_pair(self.SYNTAX_PAIR_BASE + color, color, curses.COLOR_BLACK)
+
+        # Resolve each rule group's attribute once, indexed by its group number,
+        # so the single finditer pass can dispatch on match.lastindex; the word
+        # groups are left at 0 and looked up in word_attrs instead
+        self.group_attrs: List[int] = []
+        self.word_attrs: Dict[str, int] = {}
+        self.comment_attr = 0
+        if self.syntax_rules:
+            pattern, color_map, word_colors = self.syntax_rules
+            self.group_attrs = [0] * (pattern.groups + 1)
+            for name, color in color_map.items():
+                self.group_attrs[pattern.groupindex[name]] = curses.color_pair(self.SYNTAX_PAIR_BASE + color)
+            self.word_attrs = {
+                word: curses.color_pair(self.SYNTAX_PAIR_BASE + color) for word, color in word_colors.items()
+            }
+            if 'cmt' in pattern.groupindex:
+                self.comment_attr = self.group_attrs[pattern.groupindex['cmt']]
 
     def ensure_cursor_in_bounds(self) -> None:
         """Keep cursor position within valid bounds"""
-        self.cursor_y = max(0, min(self.cursor_y, len(self.content) - 1))
-        self.cursor_x = max(0, min(self.cursor_x, len(self.content[self.cursor_y])))
+        y = max(0, min(self.cursor_y, len(self.content) - 1))
+        self.cursor_y = y
+        self.cursor_x = max(0, min(self.cursor_x, len(self.content[y])))
 
-    def display(self) -> None:
-        """Render the editor interface"""
-        self.stdscr.erase()
+    def create_windows(self) -> None:
+        """Create the text and status windows for the current terminal size"""
         height, width = self.stdscr.getmaxyx()
+        self.screen_size = (height, width)
+        self.text_win = curses.newwin(max(1, height - 2), width, 0, 0)
+        self.status_win = curses.newwin(2, width, max(0, height - 2), 0)
+        # What each text row currently shows: (line index, text, is_current), None when blank
+        self.rendered_rows: List[Optional[Tuple[int, str, bool]]] = [None] * max(1, height - 2)
+        # What the status and message bars currently show, None to force a redraw
+        self.status_key: Optional[Tuple] = None
+        self.shown_message: Optional[str] = None
+
+    def display(self) -> None:
+        """Render the editor interface, redrawing only the text rows that changed"""
+        if self.stdscr.getmaxyx() != self.screen_size:
+            self.create_windows()
+        height, width = self.screen_size
         
-        # Status bar
-        status = f"Ted - {self.filename or '[No Name]'}{' [+]' if self.dirty else ''}"
-        status += f" | {self.mode.upper()} | Line {self.cursor_y + 1}/{len(self.content)}"
-        self.stdscr.addstr(height-2, 0, status.ljust(width-1), curses.color_pair(1))
+        # Status bar, only rebuilt when one of its fields changed
+        status_key = (self.filename, self.dirty, self.mode, self.cursor_y, len(self.content))
+        if status_key != self.status_key:
+            self.status_key = status_key
+            status = f"Ted - {self.filename or '[No Name]'}{' [+]' if self.dirty else ''}"
+            status += f" | {self.mode.upper()} | Line {self.cursor_y + 1}/{len(self.content)}"
+            self.status_win.addstr(0, 0, status.ljust(width-1), curses.color_pair(1))
         
         # Message bar
-        self.stdscr.addstr(height-1, 0, self.message.ljust(width-1), curses.color_pair(2))
+        if self.message != self.shown_message:
+            self.shown_message = self.message
+            self.status_win.addstr(1, 0, self.message.ljust(width-1), curses.color_pair(2))
         self.message = ""
         
         # Display content
         start_line = max(0, self.cursor_y - height // 2)
-        for y in range(start_line, min(len(self.content), start_line + height - 2)):
-            try:
-                line = self.content[y]
-                self.display_line(y, line, y == self.cursor_y, width)
-            except curses.error:
-                pass
+        for row in range(len(self.rendered_rows)):
+            y = start_line + row
+            if y < len(self.content):
+                line = str(self.content[y])
+                shown = (y, line, y == self.cursor_y)
+            else:
+                shown = None
+            if self.rendered_rows[row] == shown:
+                continue
+            self.rendered_rows[row] = shown
+            self.text_win.move(row, 0)
+            self.text_win.clrtoeol()
+            if shown is not None:
+                try:
+                    self.display_line(row, self.content[y], line, y == self.cursor_y, width)
+                except curses.error:
+                    pass
         
         # Move cursor
         try:
-            self.stdscr.move(
+            self.text_win.move(
                 min(self.cursor_y - start_line, height-3),
                 min(self.cursor_x, width-2)
             )
         except curses.error:
             pass
         
-        self.stdscr.refresh()
+        # Stage both windows and let curses send only the changed cells; the
+        # text window goes last so the terminal cursor is left in it
+        self.status_win.noutrefresh()
+        self.text_win.noutrefresh()
+        curses.doupdate()
+
+    def line_spans(self, buf: GapBuffer, line: str, width: int) -> List[Tuple[int, int, int]]:
+        """Return the (col, length, attr) spans of a line's colored tokens"""
+        # The spans are cached on the GapBuffer and reused while the line is unchanged.
+        # A GapBuffer hands out the same str object until it is edited, so an
+        # identity check is an O(1) fingerprint of the line's contents
+        cached = buf.highlight
+        if cached is not None and cached[0] is line and cached[1] == width:
+            return cached[2]
 
-    def display_line(self, y: int, line: str, is_current: bool, width: int) -> None:
+        limit = width - 1
+        spans = []
+        code_end = len(line)
+        if self.syntax_rules:
+            # A '#' with no quote in front of it always starts the comment, so find it
+            # directly and only run the regex over the code before it
+            if self.comment_attr:
+                comment = line.find('#')
+                if comment >= 0 and line.find('"', 0, comment) < 0 and line.find("'", 0, comment) < 0:
+                    code_end = comment
+
+            pattern = self.syntax_rules[0]
+            group_attrs = self.group_attrs
+            word_attrs = self.word_attrs
+            # finditer is lazy, so breaking at the first token past the screen edge
+            # already stops the scan there. Capping endpos at the edge would instead
+            # cut off strings and words that cross it and color them wrongly.
+            for match in pattern.finditer(line, 0, code_end):
+                start, end = match.span()
+                if start >= limit:
+                    break
+                attr = group_attrs[match.lastindex]
+                if not attr:
+                    # Words are only colored when they are a keyword or import word
+                    attr = word_attrs.get(match.group())
+                    if attr is None:
+                        continue
+                if end > limit:
+                    end = limit
+                spans.append((start, end - start, attr))
+        if code_end < min(len(line), limit):
+            spans.append((code_end, min(len(line), limit) - code_end, self.comment_attr))
+
+        buf.highlight = (line, width, spans)
+        return spans
+
+    def display_line(self, row: int, buf: GapBuffer, line: str, is_current: bool, width: int) -> None:
         """Display a single line with syntax highlighting"""
+        # Write the glyphs once, then recolor the tokens in place; chgat only
+        # touches the attribute of each cell
+        extra = curses.A_REVERSE if is_current else 0
         if is_current:
-            self.stdscr.addstr(y, 0, " " * width, curses.A_REVERSE)
-        
-        if not self.syntax_rules:
-            self.stdscr.addstr(y, 0, line[:width-1])
-            return
-        
-        pos = 0
-        for pattern, color_pair in self.syntax_rules:
-            for match in pattern.finditer(line):
-                start, end = match.span()
-                if start > pos:
-                    self.stdscr.addstr(y, pos, line[pos:start][:width-1-pos])
-                if start < width:
-                    attr = curses.color_pair(color_pair)
-                    if is_current:
-                        attr |= curses.A_REVERSE
-                    self.stdscr.addstr(y, start, line[start:end][:width-1-start], attr)
-                pos = end
-        
-        if pos < len(line):
-            self.stdscr.addstr(y, pos, line[pos:][:width-1-pos])
+            self.text_win.addstr(row, 0, line[:width-1].ljust(width-1), extra)
+        else:
+            self.text_win.addstr(row, 0, line[:width-1])
+
+        for col, length, attr in self.line_spans(buf, line, width):
+            self.text_win.chgat(row, col, length, attr | extra)
 
     def handle_input(self) -> None:
-        """Process user input"""
-        key = self.stdscr.getch()
-        
-        if self.mode == 'normal':
-            self.handle_normal_mode(key)
-        elif self.mode == 'insert':
-            self.handle_insert_mode(key)
+        """Process the next key plus any already queued behind it, so a burst costs one redraw"""
+        key = self.wait_key()
+        pending: List[str] = []  # Printable keys typed in insert mode, inserted together
+        while True:
+            if self.mode == 'insert' and 32 <= key <= 126:
+                pending.append(chr(key))
+            else:
+                if pending:
+                    self.insert_text(''.join(pending))
+                    pending = []
+                if self.mode == 'normal':
+                    self.handle_normal_mode(key)
+                elif self.mode == 'insert':
+                    self.handle_insert_mode(key)
+                if self.quit:
+                    return
+
+            # Only peek without blocking; handlers such as 'g' and ':' read
+            # follow-up keys themselves and must still wait for them
+            self.stdscr.nodelay(True)
+            key = self.stdscr.getch()
+            self.stdscr.nodelay(False)
+            if key == -1:
+                break
+        if pending:
+            self.insert_text(''.join(pending))
+
+    def wait_key(self) -> int:
+        """Block for the next key, highlighting the rest of the file while none is waiting"""
+        if self.syntax_rules and self.prescan_y < len(self.content):
+            self.stdscr.nodelay(True)
+            try:
+                while self.prescan_y < len(self.content):
+                    key = self.stdscr.getch()
+                    if key != -1:
+                        return key
+                    self.highlight_ahead()
+            finally:
+                self.stdscr.nodelay(False)
+        return self.stdscr.getch()
+
+    def highlight_ahead(self, count: int = 256) -> None:
+        """Fill the cached spans of the next count lines, so scrolling to them later is free"""
+        content = self.content
+        width = self.screen_size[1]
+        end = min(self.prescan_y + count, len(content))
+        for y in range(self.prescan_y, end):
+            buf = content[y]
+            self.line_spans(buf, str(buf), width)
+        self.prescan_y = end
+
+    def bind_keys(self) -> None:
+        """Build the key -> handler tables for normal and insert mode"""
+        self.normal_handlers: Dict[int, Callable[[], None]] = {
+            ord('i'): self.enter_insert_mode,
+            ord('a'): self.append,
+            ord('h'): self.move_left,
+            curses.KEY_LEFT: self.move_left,
+            ord('j'): self.move_down,
+            curses.KEY_DOWN: self.move_down,
+            ord('k'): self.move_up,
+            curses.KEY_UP: self.move_up,
+            ord('l'): self.move_right,
+            curses.KEY_RIGHT: self.move_right,
+            ord(':'): self.get_command,
+            ord('x'): self.delete_char,
+            ord('o'): self.open_line_below,
+            ord('O'): self.open_line_above,
+            ord('$'): self.move_to_line_end,
+            ord('0'): self.move_to_line_start,
+            ord('G'): self.goto_last_line,
+            ord('g'): self.goto_first_line,
+        }
+        self.insert_handlers: Dict[int, Callable[[], None]] = {
+            27: self.leave_insert_mode,  # ESC
+            curses.KEY_BACKSPACE: self.backspace,
+            127: self.backspace,
+            curses.KEY_ENTER: self.newline,
+            10: self.newline,
+            curses.KEY_LEFT: self.move_left,
+            curses.KEY_RIGHT: self.move_right,
+            curses.KEY_UP: self.move_up,
+            curses.KEY_DOWN: self.move_down,
+        }
 
     def handle_normal_mode(self, key: int) -> None:
         """Handle key presses in normal mode"""
-        self.ensure_cursor_in_bounds()
-        height, width = self.stdscr.getmaxyx()
-        
-        if key == ord('i'):
-            self.mode = 'insert'
-        elif key == ord('a'):
-            self.cursor_x = min(len(self.content[self.cursor_y]), self.cursor_x + 1)
-            self.mode = 'insert'
-        elif key == ord('h') or key == curses.KEY_LEFT:
-            self.cursor_x = max(0, self.cursor_x - 1)
-        elif key == ord('j') or key == curses.KEY_DOWN:
-            self.cursor_y = min(len(self.content)-1, self.cursor_y + 1)
-            self.cursor_x = min(self.cursor_x, len(self.content[self.cursor_y]))
-        elif key == ord('k') or key == curses.KEY_UP:
-            self.cursor_y = max(0, self.cursor_y - 1)
-            self.cursor_x = min(self.cursor_x, len(self.content[self.cursor_y]))
-        elif key == ord('l') or key == curses.KEY_RIGHT:
-            self.cursor_x = min(len(self.content[self.cursor_y]), self.cursor_x + 1)
-        elif key == ord(':'):
-            self.get_command()
-        elif key == ord('x'):
-            if self.cursor_x < len(self.content[self.cursor_y]):
-                line = self.content[self.cursor_y]
-                self.content[self.cursor_y] = line[:self.cursor_x] + line[self.cursor_x+1:]
-                self.dirty = True
-        elif key == ord('o'):
-            self.content.insert(self.cursor_y + 1, "")
-            self.cursor_y += 1
-            self.cursor_x = 0
-            self.mode = 'insert'
-            self.dirty = True
-        elif key == ord('O'):
-            self.content.insert(self.cursor_y, "")
-            self.cursor_x = 0
-            self.mode = 'insert'
-            self.dirty = True
-        elif key == ord('$'):
-            self.cursor_x = len(self.content[self.cursor_y])
-        elif key == ord('0'):
-            self.cursor_x = 0
-        elif key == ord('G'):
-            self.cursor_y = len(self.content) - 1
-            self.cursor_x = min(self.cursor_x, len(self.content[self.cursor_y]))
-        elif key == ord('g'):
-            next_key = self.stdscr.getch()
-            if next_key == ord('g'):
-                self.cursor_y = 0
-                self.cursor_x = min(self.cursor_x, len(self.content[self.cursor_y]))
-        elif key == curses.KEY_RESIZE:
-            pass
-        elif key == 27:  # ESC
-            pass
+        handler = self.normal_handlers.get(key)
+        if handler:
+            handler()
 
     def handle_insert_mode(self, key: int) -> None:
         """Handle key presses in insert mode"""
-        self.ensure_cursor_in_bounds()
-        
-        if key == 27:  # ESC
-            self.mode = 'normal'
-        elif key == curses.KEY_BACKSPACE or key == 127:
-            if self.cursor_x > 0:
-                line = self.content[self.cursor_y]
-                self.content[self.cursor_y] = line[:self.cursor_x-1] + line[self.cursor_x:]
-                self.cursor_x -= 1
-                self.dirty = True
-            elif self.cursor_y > 0:
-                self.cursor_x = len(self.content[self.cursor_y-1])
-                self.content[self.cursor_y-1] += self.content[self.cursor_y]
-                del self.content[self.cursor_y]
-                self.cursor_y -= 1
-                self.dirty = True
-        elif key == curses.KEY_ENTER or key == 10:
-            line = self.content[self.cursor_y]
-            self.content.insert(self.cursor_y + 1, line[self.cursor_x:])
-            self.content[self.cursor_y] = line[:self.cursor_x]
-            self.cursor_y += 1
-            self.cursor_x = 0
-            self.dirty = True
-        elif key == curses.KEY_LEFT:
-            self.cursor_x = max(0, self.cursor_x - 1)
-        elif key == curses.KEY_RIGHT:
-            self.cursor_x = min(len(self.content[self.cursor_y]), self.cursor_x + 1)
-        elif key == curses.KEY_UP:
-            self.cursor_y = max(0, self.cursor_y - 1)
-            self.cursor_x = min(self.cursor_x, len(self.content[self.cursor_y]))
-        elif key == curses.KEY_DOWN:
-            self.cursor_y = min(len(self.content)-1, self.cursor_y + 1)
-            self.cursor_x = min(self.cursor_x, len(self.content[self.cursor_y]))
+        handler = self.insert_handlers.get(key)
+        if handler:
+            handler()
         elif 32 <= key <= 126:  # Printable characters
-            line = self.content[self.cursor_y]
-            self.content[self.cursor_y] = line[:self.cursor_x] + chr(key) + line[self.cursor_x:]
+            self.insert_text(chr(key))
+
+    def enter_insert_mode(self) -> None:
+        """Switch to insert mode at the cursor"""
+        self.mode = 'insert'
+
+    def leave_insert_mode(self) -> None:
+        """Switch back to normal mode"""
+        self.mode = 'normal'
+
+    def append(self) -> None:
+        """Switch to insert mode after the cursor"""
+        self.ensure_cursor_in_bounds()
+        llen = len(self.content[self.cursor_y])
+        if self.cursor_x < llen:
             self.cursor_x += 1
+        self.mode = 'insert'
+
+    def move_left(self) -> None:
+        """Move the cursor one character left"""
+        self.cursor_x = max(0, self.cursor_x - 1)
+
+    def move_right(self) -> None:
+        """Move the cursor one character right"""
+        x = self.cursor_x
+        if x < len(self.content[self.cursor_y]):
+            self.cursor_x = x + 1
+
+    def move_up(self) -> None:
+        """Move the cursor one line up"""
+        y = max(0, self.cursor_y - 1)
+        self.cursor_y = y
+        self.cursor_x = min(self.cursor_x, len(self.content[y]))
+
+    def move_down(self) -> None:
+        """Move the cursor one line down"""
+        content = self.content
+        y = min(len(content)-1, self.cursor_y + 1)
+        self.cursor_y = y
+        self.cursor_x = min(self.cursor_x, len(content[y]))
+
+    def move_to_line_end(self) -> None:
+        """Move the cursor to the end of the line"""
+        self.cursor_x = len(self.content[self.cursor_y])
+
+    def move_to_line_start(self) -> None:
+        """Move the cursor to the start of the line"""
+        self.cursor_x = 0
+
+    def goto_last_line(self) -> None:
+        """Move the cursor to the last line"""
+        content = self.content
+        self.cursor_y = len(content) - 1
+        self.cursor_x = min(self.cursor_x, len(content[-1]))
+
+    def goto_first_line(self) -> None:
+        """Move the cursor to the first line (on 'gg')"""
+        next_key = self.stdscr.getch()
+        if next_key == ord('g'):
+            self.cursor_y = 0
+            self.cursor_x = min(self.cursor_x, len(self.content[0]))
+
+    def delete_char(self) -> None:
+        """Delete the character under the cursor"""
+        self.ensure_cursor_in_bounds()
+        line = self.content[self.cursor_y]
+        x = self.cursor_x
+        if x < len(line):
+            line.move_to(x)
+            line.delete_forward()
+            self.dirty = True
+
+    def open_line_below(self) -> None:
+        """Open a new line below the cursor and start inserting there"""
+        self.content.insert(self.cursor_y + 1, GapBuffer())
+        self.cursor_y += 1
+        self.cursor_x = 0
+        self.mode = 'insert'
+        self.dirty = True
+
+    def open_line_above(self) -> None:
+        """Open a new line above the cursor and start inserting there"""
+        self.content.insert(self.cursor_y, GapBuffer())
+        self.cursor_x = 0
+        self.mode = 'insert'
+        self.dirty = True
+
+    def backspace(self) -> None:
+        """Delete the character before the cursor, joining lines at the start of a line"""
+        self.ensure_cursor_in_bounds()
+        y, x = self.cursor_y, self.cursor_x
+        content = self.content
+        if x > 0:
+            line = content[y]
+            line.move_to(x)
+            line.delete_back()
+            self.cursor_x = x - 1
+            self.dirty = True
+        elif y > 0:
+            prev_line = content[y-1]
+            llen = len(prev_line)
+            prev_line.move_to(llen)
+            prev_line.insert(str(content[y]))
+            del content[y]
+            self.cursor_y = y - 1
+            self.cursor_x = llen
             self.dirty = True
 
+    def newline(self) -> None:
+        """Split the line at the cursor"""
+        self.ensure_cursor_in_bounds()
+        y = self.cursor_y
+        self.content.insert(y + 1, self.content[y].split(self.cursor_x))
+        self.cursor_y = y + 1
+        self.cursor_x = 0
+        self.dirty = True
+
+    def insert_text(self, text: str) -> None:
+        """Insert printable text at the cursor"""
+        self.ensure_cursor_in_bounds()
+        line = self.content[self.cursor_y]
+        line.move_to(self.cursor_x)
+        line.insert(text)
+        self.cursor_x += len(text)
+        self.dirty = True
+
     def get_command(self) -> None:
         """Process command-line commands (starting with :)"""
         height, width = self.stdscr.getmaxyx()
@@ -308,11 +663,13 @@ class Ted:
             key = self.stdscr.getch()
             
             if key == curses.KEY_ENTER or key == 10:
+                self.shown_message = None  # The prompt was drawn over the message bar
                 self.process_command(cmd)
                 return
             elif key == curses.KEY_BACKSPACE or key == 127:
                 cmd = cmd[:-1]
             elif key == 27:  # ESC
+                self.shown_message = None
                 return
             elif 32 <= key <= 126:
                 cmd += chr(key)
@@ -348,8 +705,17 @@ class Ted:
     def save_file(self) -> None:
         """Save content to file"""
         try:
-            with open(self.filename, 'w') as f:
-                f.write("\n".join(self.content))
+            # Encode line by line and join as bytes: no intermediate whole-file str
+            data = self.line_ending.join(str(line).encode('utf-8', 'surrogateescape') for line in self.content)
+            if self.trailing_newline:
+                data += self.line_ending
+            fd = os.open(self.filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+            finally:
+                os.close(fd)
             self.message = f"'{self.filename}' {len(self.content)}L written"
             self.dirty = False
         except Exception as e: